@@ -19,6 +19,7 @@ from app.models.db_models.enums import (
 )
 from markupsafe import Markup
 from app.core.security import get_password_hash
+from app.services.ai_model import AIModelService
 from datetime import datetime, timezone
 from sqlalchemy import Select, select
 from sqlalchemy.orm import selectinload
@@ -116,6 +117,14 @@ class AIModelAdmin(ModelView, model=AIModel):
         },
     }
 
+    async def after_model_change(
+        self, data: dict[str, Any], model: AIModel, is_created: bool, request: Request
+    ) -> None:
+        await AIModelService.invalidate_cache()
+
+    async def after_model_delete(self, model: AIModel, request: Request) -> None:
+        await AIModelService.invalidate_cache(model.model_id)
+
     name = "AI Model"
     name_plural = "AI Models"
     icon = "fa-solid fa-robot"
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from app.core.deps import get_chat_service, get_sandbox_service
 from app.core.security import get_current_user
@@ -21,6 +22,7 @@ from app.models.schemas import (
 from app.services.chat import ChatService
 from app.services.exceptions import SandboxException
 from app.services.sandbox import SandboxService
+from app.utils.redis import get_shared_redis
 
 
 router = APIRouter()
@@ -31,13 +33,14 @@ async def _verify_sandbox_ownership(
     current_user: User,
     chat_service: ChatService,
 ) -> None:
-    exists = await chat_service.sandbox_exists(sandbox_id)
+    exists, has_access = await chat_service.check_sandbox_access(
+        sandbox_id, current_user.id, redis=get_shared_redis()
+    )
     if not exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Sandbox not found",
         )
-    has_access = await chat_service.verify_sandbox_access(sandbox_id, current_user.id)
     if not has_access:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -226,14 +229,14 @@ async def download_sandbox_files(
     current_user: User = Depends(get_current_user),
     chat_service: ChatService = Depends(get_chat_service),
     sandbox_service: SandboxService = Depends(get_sandbox_service),
-) -> Response:
+) -> StreamingResponse:
     await _verify_sandbox_ownership(sandbox_id, current_user, chat_service)
 
     try:
-        zip_bytes = await sandbox_service.generate_zip_download(sandbox_id)
+        zip_chunks = await sandbox_service.stream_zip_download(sandbox_id)
 
-        return Response(
-            content=zip_bytes,
+        return StreamingResponse(
+            zip_chunks,
             media_type="application/zip",
             headers={
                 "Content-Disposition": f'attachment; filename="sandbox_{sandbox_id}.zip"'
@@ -13,5 +13,6 @@ REDIS_KEY_PERMISSION_REQUEST: Final[str] = "permission_request:{request_id}"
 REDIS_KEY_PERMISSION_RESPONSE: Final[str] = "permission_response:{request_id}"
 REDIS_KEY_USER_SETTINGS: Final[str] = "user_settings:{user_id}"
 REDIS_KEY_MODELS_LIST: Final[str] = "models:list:{active_only}"
+REDIS_KEY_SANDBOX_ACCESS: Final[str] = "authz:sbx:{sandbox_id}:{user_id}"
 
 SANDBOX_AUTO_PAUSE_TIMEOUT: Final[int] = 3000
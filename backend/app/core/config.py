@@ -148,6 +148,10 @@ class Settings(BaseSettings):
     CHAT_REVOKED_KEY_TTL_SECONDS: int = 3600
     USER_SETTINGS_CACHE_TTL_SECONDS: int = 300
     MODELS_CACHE_TTL_SECONDS: int = 3600
+    MODELS_LOCAL_CACHE_TTL_SECONDS: int = 30
+    AI_MODEL_CACHE_TTL_SECONDS: int = 300
+    AI_MODEL_PROVIDER_CACHE_TTL_SECONDS: int = 600
+    SANDBOX_ACCESS_CACHE_TTL_SECONDS: int = 30
 
     class Config:
         env_file = ".env"
@@ -21,35 +21,35 @@ from app.services.storage import StorageService
 from app.services.user import UserService
 
 
-def get_ai_model_service() -> AIModelService:
+async def get_ai_model_service() -> AIModelService:
     return AIModelService(session_factory=SessionLocal)
 
 
-def get_message_service() -> MessageService:
+async def get_message_service() -> MessageService:
     return MessageService(session_factory=SessionLocal)
 
 
-def get_user_service() -> UserService:
+async def get_user_service() -> UserService:
     return UserService(session_factory=SessionLocal)
 
 
-def get_refresh_token_service() -> RefreshTokenService:
+async def get_refresh_token_service() -> RefreshTokenService:
     return RefreshTokenService(session_factory=SessionLocal)
 
 
-def get_skill_service() -> SkillService:
+async def get_skill_service() -> SkillService:
     return SkillService()
 
 
-def get_command_service() -> CommandService:
+async def get_command_service() -> CommandService:
     return CommandService()
 
 
-def get_agent_service() -> AgentService:
+async def get_agent_service() -> AgentService:
     return AgentService()
 
 
-def get_scheduler_service() -> SchedulerService:
+async def get_scheduler_service() -> SchedulerService:
     return SchedulerService(session_factory=SessionLocal)
 
 
@@ -26,6 +26,8 @@ from app.core.middleware import (
     setup_middleware,
 )
 from app.db.session import engine, celery_engine, SessionLocal
+from app.services.ai_model import AIModelService
+from app.utils.redis import close_shared_redis
 from app.admin.config import create_admin
 from app.admin.views import (
     AIModelAdmin,
@@ -44,7 +46,12 @@ settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    try:
+        await AIModelService().warm_cache()
+    except Exception as e:
+        logger.warning("Failed to warm AI model cache: %s", e)
     yield
+    await close_shared_redis()
     await engine.dispose()
     await celery_engine.dispose()
 
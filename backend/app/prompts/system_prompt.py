@@ -1,4 +1,7 @@
+import time
 from datetime import datetime
+from functools import lru_cache
+from string import Template
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -17,6 +20,9 @@ def _get_github_section(github_token_configured: bool) -> str:
 """
 
 
+_GITHUB_SECTION = _get_github_section(True)
+
+
 def _get_env_vars_section(env_vars_formatted: str | None) -> str:
     if not env_vars_formatted:
         return ""
@@ -30,21 +36,13 @@ def _get_env_vars_section(env_vars_formatted: str | None) -> str:
 """
 
 
-def get_system_prompt(
-    sandbox_id: str,
-    github_token_configured: bool = False,
-    env_vars_formatted: str | None = None,
-) -> str:
-    current_date = datetime.utcnow().strftime("%Y-%m-%d")
-    github_section = _get_github_section(github_token_configured)
-    env_section = _get_env_vars_section(env_vars_formatted)
-
-    return f"""
+_TEMPLATE = Template(
+    """
 <runtime_context>
 - Workspace: /home/user
-- Sandbox: {sandbox_id}
-- Date: {current_date}
-- Public URL pattern: https://<port>-{sandbox_id}.e2b.dev
+- Sandbox: $sandbox_id
+- Date: $current_date
+- Public URL pattern: https://<port>-$sandbox_id.e2b.dev
 </runtime_context>
 
 <anti_patterns>
@@ -71,10 +69,43 @@ def get_system_prompt(
 - Use descriptive variable and function names that match the project's naming conventions
 </best_practices>
 
-{github_section}
+$github_section
 
-{env_section}
+$env_section
 """
+)
+
+
+@lru_cache(maxsize=1)
+def _cached_date(epoch_minute: int) -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+@lru_cache(maxsize=256)
+def _render_system_prompt(
+    sandbox_id: str,
+    current_date: str,
+    github_token_configured: bool,
+    env_vars_formatted: str | None,
+) -> str:
+    github_section = _GITHUB_SECTION if github_token_configured else ""
+    return _TEMPLATE.substitute(
+        sandbox_id=sandbox_id,
+        current_date=current_date,
+        github_section=github_section,
+        env_section=_get_env_vars_section(env_vars_formatted),
+    )
+
+
+def get_system_prompt(
+    sandbox_id: str,
+    github_token_configured: bool = False,
+    env_vars_formatted: str | None = None,
+) -> str:
+    current_date = _cached_date(int(time.time()) // 60)
+    return _render_system_prompt(
+        sandbox_id, current_date, github_token_configured, env_vars_formatted
+    )
 
 
 def build_system_prompt_for_chat(
@@ -1,38 +1,129 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, cast
+import logging
+import time
+from typing import TYPE_CHECKING, Any, cast
 
 from pydantic import TypeAdapter
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from sqlalchemy import select
 
 from app.constants import REDIS_KEY_MODELS_LIST
 from app.core.config import get_settings
 from app.models.db_models import AIModel, ModelProvider
 from app.services.base import BaseDbService, SessionFactoryType
+from app.utils.redis import redis_connection
 
 if TYPE_CHECKING:
     from app.models.schemas import AIModelResponse
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+AI_MODEL_CACHE_MAX_SIZE = 256
+
+
+def _cache_get(cache: dict[Any, tuple[float, Any]], key: Any) -> Any | None:
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if expires_at <= time.monotonic():
+        cache.pop(key, None)
+        return None
+    return value
+
+
+def _cache_set(
+    cache: dict[Any, tuple[float, Any]], key: Any, value: Any, ttl_seconds: int
+) -> None:
+    if key not in cache and len(cache) >= AI_MODEL_CACHE_MAX_SIZE:
+        del cache[next(iter(cache))]
+    cache[key] = (time.monotonic() + ttl_seconds, value)
 
 
 class AIModelService(BaseDbService[AIModel]):
+    # Per-process caches; models only change through the admin panel, which calls
+    # invalidate_cache, and other workers converge once the TTL expires.
+    _models_by_id: dict[str, tuple[float, AIModel]] = {}
+    _providers_by_id: dict[str, tuple[float, ModelProvider]] = {}
+    _models_list: dict[bool, tuple[float, list[AIModelResponse]]] = {}
+
     def __init__(self, session_factory: SessionFactoryType | None = None) -> None:
         super().__init__(session_factory)
 
+    @classmethod
+    def clear_local_cache(cls, model_id: str | None = None) -> None:
+        if model_id is None:
+            cls._models_by_id.clear()
+            cls._providers_by_id.clear()
+        else:
+            cls._models_by_id.pop(model_id, None)
+            cls._providers_by_id.pop(model_id, None)
+        cls._models_list.clear()
+
+    @classmethod
+    async def invalidate_cache(cls, model_id: str | None = None) -> None:
+        cls.clear_local_cache(model_id)
+        try:
+            async with redis_connection() as redis:
+                await redis.delete(
+                    REDIS_KEY_MODELS_LIST.format(active_only=True),
+                    REDIS_KEY_MODELS_LIST.format(active_only=False),
+                )
+        except RedisError as e:
+            logger.warning("Failed to invalidate models list cache: %s", e)
+
+    async def warm_cache(self) -> None:
+        from app.models.schemas import AIModelResponse
+
+        models = cast(list[AIModel], await self.get_models(active_only=False))
+        for model in models:
+            _cache_set(
+                AIModelService._models_by_id,
+                model.model_id,
+                model,
+                settings.AI_MODEL_CACHE_TTL_SECONDS,
+            )
+            _cache_set(
+                AIModelService._providers_by_id,
+                model.model_id,
+                model.provider,
+                settings.AI_MODEL_PROVIDER_CACHE_TTL_SECONDS,
+            )
+        _cache_set(
+            AIModelService._models_list,
+            True,
+            [AIModelResponse.model_validate(m) for m in models if m.is_active],
+            settings.MODELS_LOCAL_CACHE_TTL_SECONDS,
+        )
+
     async def get_models(
         self, active_only: bool = True, redis: Redis[str] | None = None
     ) -> list[AIModelResponse] | list[AIModel]:
         from app.models.schemas import AIModelResponse
 
+        if active_only:
+            local = _cache_get(AIModelService._models_list, active_only)
+            if local is not None:
+                return cast(list[AIModelResponse], local)
+
         cache_key = REDIS_KEY_MODELS_LIST.format(active_only=active_only)
 
         if redis:
             cached = await redis.get(cache_key)
             if cached:
                 adapter = TypeAdapter(list[AIModelResponse])
-                return cast(list[AIModelResponse], adapter.validate_json(cached))
+                responses = adapter.validate_json(cached)
+                if active_only:
+                    _cache_set(
+                        AIModelService._models_list,
+                        active_only,
+                        responses,
+                        settings.MODELS_LOCAL_CACHE_TTL_SECONDS,
+                    )
+                return responses
 
         async with self.session_factory() as db:
             query = select(AIModel).order_by(AIModel.sort_order, AIModel.name)
@@ -41,24 +132,63 @@ class AIModelService(BaseDbService[AIModel]):
             result = await db.execute(query)
             models = list(result.scalars().all())
 
-        if redis:
+        if active_only or redis:
             responses = [AIModelResponse.model_validate(m) for m in models]
-            adapter = TypeAdapter(list[AIModelResponse])
-            await redis.setex(
-                cache_key,
-                settings.MODELS_CACHE_TTL_SECONDS,
-                adapter.dump_json(responses),
-            )
+            if active_only:
+                _cache_set(
+                    AIModelService._models_list,
+                    active_only,
+                    responses,
+                    settings.MODELS_LOCAL_CACHE_TTL_SECONDS,
+                )
+            if redis:
+                adapter = TypeAdapter(list[AIModelResponse])
+                await redis.setex(
+                    cache_key,
+                    settings.MODELS_CACHE_TTL_SECONDS,
+                    adapter.dump_json(responses),
+                )
 
         return models
 
     async def get_model_by_model_id(self, model_id: str) -> AIModel | None:
+        cached = cast(
+            AIModel | None, _cache_get(AIModelService._models_by_id, model_id)
+        )
+        if cached is not None:
+            return cached
+
         async with self.session_factory() as db:
             result = await db.execute(
                 select(AIModel).filter(AIModel.model_id == model_id)
             )
-            return cast(AIModel | None, result.scalar_one_or_none())
+            model = cast(AIModel | None, result.scalar_one_or_none())
+            if model is not None:
+                db.expunge(model)
+
+        if model is not None:
+            _cache_set(
+                AIModelService._models_by_id,
+                model_id,
+                model,
+                settings.AI_MODEL_CACHE_TTL_SECONDS,
+            )
+        return model
 
     async def get_model_provider(self, model_id: str) -> ModelProvider | None:
+        cached = cast(
+            ModelProvider | None, _cache_get(AIModelService._providers_by_id, model_id)
+        )
+        if cached is not None:
+            return cached
+
         model = await self.get_model_by_model_id(model_id)
-        return model.provider if model else None
+        if model is None:
+            return None
+        _cache_set(
+            AIModelService._providers_by_id,
+            model_id,
+            model.provider,
+            settings.AI_MODEL_PROVIDER_CACHE_TTL_SECONDS,
+        )
+        return model.provider
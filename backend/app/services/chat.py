@@ -6,10 +6,12 @@ from typing import cast
 from uuid import UUID
 
 from celery.result import AsyncResult
-from sqlalchemy import exists, func, select, update
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import and_, exists, func, select, update
 from sqlalchemy.orm import selectinload
 
-from app.constants import REDIS_KEY_CHAT_TASK
+from app.constants import REDIS_KEY_CHAT_TASK, REDIS_KEY_SANDBOX_ACCESS
 from app.core.config import get_settings
 from app.models.db_models import (
     Chat,
@@ -268,6 +270,7 @@ class ChatService(BaseDbService[Chat]):
             await db.commit()
 
             if chat.sandbox_id:
+                await self.invalidate_sandbox_access([chat.sandbox_id], user.id)
                 await self.sandbox_service.delete_sandbox(chat.sandbox_id)
 
     async def get_chat_sandbox_id(self, chat_id: UUID, user: User) -> str | None:
@@ -294,28 +297,60 @@ class ChatService(BaseDbService[Chat]):
             sandbox_id_value: str | None = row[0]
             return sandbox_id_value
 
-    async def verify_sandbox_access(self, sandbox_id: str, user_id: UUID) -> bool:
+    async def check_sandbox_access(
+        self, sandbox_id: str, user_id: UUID, redis: Redis[str] | None = None
+    ) -> tuple[bool, bool]:
+        # Returns (exists, has_access) from a single round-trip. Grants are cached only
+        # in Redis so a delete on one worker revokes them for every worker; denials are
+        # never cached so a newly created chat is not hidden behind one. Redis errors
+        # fall back to the database rather than failing the request.
+        redis_key = REDIS_KEY_SANDBOX_ACCESS.format(
+            sandbox_id=sandbox_id, user_id=user_id
+        )
+        if redis:
+            try:
+                if await redis.get(redis_key):
+                    return True, True
+            except RedisError as e:
+                logger.warning("Sandbox access cache read failed: %s", e)
+                redis = None
+
         async with self.session_factory() as db:
+            active = and_(Chat.sandbox_id == sandbox_id, Chat.deleted_at.is_(None))
             query = select(
-                exists().where(
-                    Chat.sandbox_id == sandbox_id,
-                    Chat.user_id == user_id,
-                    Chat.deleted_at.is_(None),
-                )
+                exists().where(active),
+                exists().where(active, Chat.user_id == user_id),
             )
             result = await db.execute(query)
-            return bool(result.scalar())
+            sandbox_found, has_access = result.one()
 
-    async def sandbox_exists(self, sandbox_id: str) -> bool:
-        async with self.session_factory() as db:
-            query = select(
-                exists().where(
-                    Chat.sandbox_id == sandbox_id,
-                    Chat.deleted_at.is_(None),
+        if has_access and redis:
+            try:
+                await redis.setex(
+                    redis_key, settings.SANDBOX_ACCESS_CACHE_TTL_SECONDS, "1"
                 )
-            )
-            result = await db.execute(query)
-            return bool(result.scalar())
+            except RedisError as e:
+                logger.warning("Sandbox access cache write failed: %s", e)
+        return bool(sandbox_found), bool(has_access)
+
+    async def invalidate_sandbox_access(
+        self, sandbox_ids: list[str], user_id: UUID
+    ) -> None:
+        # Only the owner can hold a cached grant, so dropping their keys is enough.
+        if not sandbox_ids:
+            return
+        try:
+            async with redis_connection() as redis:
+                await redis.delete(
+                    *(
+                        REDIS_KEY_SANDBOX_ACCESS.format(
+                            sandbox_id=sandbox_id, user_id=user_id
+                        )
+                        for sandbox_id in sandbox_ids
+                    )
+                )
+        except RedisError as e:
+            logger.warning("Failed to invalidate sandbox access cache: %s", e)
 
     async def delete_all_chats(self, user: User) -> int:
         async with self.session_factory() as db:
@@ -350,6 +385,8 @@ class ChatService(BaseDbService[Chat]):
 
             await db.commit()
 
+            await self.invalidate_sandbox_access(sandbox_ids, user.id)
+
             for sandbox_id in sandbox_ids:
                 await self.sandbox_service.delete_sandbox(sandbox_id)
 
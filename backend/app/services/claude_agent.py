@@ -172,7 +172,7 @@ class ClaudeAgentService:
             raise ClaudeAgentException(str(e)) from e
 
         sandbox_id_str = str(sandbox_id)
-        async with SandboxService(e2b_api_key):
+        async with SandboxService(e2b_api_key) as sandbox_service:
             prompt_message = {
                 "type": "user",
                 "message": {"role": "user", "content": user_prompt},
@@ -187,6 +187,7 @@ class ClaudeAgentService:
                 api_key=e2b_api_key,
                 prompt=prompt_iterable,
                 options=options,
+                sandbox_service=sandbox_service,
             ) as transport:
                 self._active_transport = transport
 
@@ -223,6 +224,7 @@ class ClaudeAgentService:
                 options,
                 sandbox_id=sandbox_id_str,
                 e2b_api_key=e2b_api_key,
+                sandbox_service=sandbox_service,
             )
             if token_usage is not None:
                 await self._update_chat_token_usage(chat_id, token_usage)
@@ -533,7 +535,11 @@ class ClaudeAgentService:
             logger.error("Failed to update chat token usage: %s", e)
 
     async def _get_context_token_usage(
-        self, options: ClaudeAgentOptions, sandbox_id: str, e2b_api_key: str
+        self,
+        options: ClaudeAgentOptions,
+        sandbox_id: str,
+        e2b_api_key: str,
+        sandbox_service: SandboxService | None = None,
     ) -> int | None:
         # Extracts token usage by running the /context command and parsing the response.
         # The Claude CLI outputs context info in a specific format:
@@ -553,6 +559,7 @@ class ClaudeAgentService:
                 api_key=e2b_api_key,
                 prompt=prompt_iterable,
                 options=options,
+                sandbox_service=sandbox_service,
             ) as transport:
                 self._active_transport = transport
 
@@ -3,12 +3,13 @@ import json
 import logging
 import re
 import shlex
-from collections.abc import AsyncIterable, AsyncIterator
+from collections.abc import AsyncIterable, AsyncIterator, Iterator
 from contextlib import suppress
-from dataclasses import asdict
+from dataclasses import dataclass, field, fields
 from types import TracebackType
-from typing import Any, Self
+from typing import Any, NamedTuple, Self, cast
 
+import orjson
 from claude_agent_sdk._errors import (
     CLIConnectionError,
     CLIJSONDecodeError,
@@ -21,15 +22,178 @@ from e2b import AsyncSandbox
 from e2b.sandbox.commands.command_handle import CommandExitException
 from e2b.sandbox_async.commands.command_handle import AsyncCommandHandle
 
-from app.services.sandbox import SANDBOX_AUTO_PAUSE_TIMEOUT
+from app.services.sandbox import SANDBOX_AUTO_PAUSE_TIMEOUT, SandboxService
 
 _DEFAULT_MAX_BUFFER_SIZE = 1024 * 1024 * 10  # 10MB
-_STDOUT_QUEUE_MAXSIZE = 32
+_STDOUT_QUEUE_MAXSIZE = 256
+_STDOUT_FLUSH_SIZE = 16 * 1024
+_STDOUT_FLUSH_DELAY_SECONDS = 0.005
 _ANSI_ESCAPE_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+_STATIC_ENVS = {
+    "CLAUDE_CODE_ENTRYPOINT": "sdk-py",
+    "CLAUDE_AGENT_SDK_VERSION": sdk_version,
+    "CLAUDE_CODE_SANDBOX": "1",
+    "PYTHONUNBUFFERED": "1",
+}
+_JSON_START_RE = re.compile(r"[{\[]")
+_JSON_CLOSERS = {"{": "}", "[": "]"}
+
+
+@dataclass
+class _JsonStreamState:
+    # Fragments are joined only when a line could close a JSON value, so a large
+    # message streamed over many lines is copied once instead of once per line.
+    parts: list[str] = field(default_factory=list)
+    length: int = 0
+    started: bool = False
+    finished: bool = False
+
 
 logger = logging.getLogger(__name__)
 
 
+class _CommandSpec(NamedTuple):
+    cli_binary: str
+    system_prompt_flag: tuple[str, str] | None
+    allowed_tools: tuple[str, ...]
+    max_turns: int | None
+    disallowed_tools: tuple[str, ...]
+    model: str | None
+    permission_prompt_tool_name: str | None
+    permission_mode: str | None
+    continue_conversation: bool
+    resume: str | None
+    settings: str | None
+    add_dirs: tuple[str, ...]
+    mcp_config: str | None
+    include_partial_messages: bool
+    fork_session: bool
+    max_thinking_tokens: int | None
+    agents: str | None
+    setting_sources: str
+    extra_args: tuple[tuple[str, str | None], ...]
+
+
+def _system_prompt_flag(options: ClaudeAgentOptions) -> tuple[str, str] | None:
+    system_prompt = options.system_prompt
+    if system_prompt is None:
+        return None
+    if isinstance(system_prompt, str):
+        return ("--system-prompt", system_prompt)
+    if system_prompt.get("type") == "preset" and "append" in system_prompt:
+        return ("--append-system-prompt", system_prompt["append"])
+    return None
+
+
+def _mcp_config_arg(options: ClaudeAgentOptions) -> str | None:
+    if not options.mcp_servers:
+        return None
+    if not isinstance(options.mcp_servers, dict):
+        return str(options.mcp_servers)
+    servers_for_cli: dict[str, Any] = {}
+    for name, config in options.mcp_servers.items():
+        if isinstance(config, dict) and config.get("type") == "sdk":
+            servers_for_cli[name] = {
+                key: value for key, value in config.items() if key != "instance"
+            }
+        else:
+            servers_for_cli[name] = config
+    if not servers_for_cli:
+        return None
+    return orjson.dumps({"mcpServers": servers_for_cli}).decode()
+
+
+def _agents_arg(options: ClaudeAgentOptions) -> str | None:
+    if not options.agents:
+        return None
+    agents_dict = {
+        name: {
+            field.name: value
+            for field in fields(agent_def)
+            if (value := getattr(agent_def, field.name)) is not None
+        }
+        for name, agent_def in options.agents.items()
+    }
+    return orjson.dumps(agents_dict).decode()
+
+
+def _command_spec(options: ClaudeAgentOptions) -> _CommandSpec:
+    # Not memoized: the MCP config carries per-turn chat tokens and user API keys,
+    # so a cache would never hit across turns and would keep secrets in the worker.
+    return _CommandSpec(
+        cli_binary=str(options.cli_path) if options.cli_path else "claude",
+        system_prompt_flag=_system_prompt_flag(options),
+        allowed_tools=tuple(options.allowed_tools),
+        max_turns=options.max_turns,
+        disallowed_tools=tuple(options.disallowed_tools),
+        model=options.model,
+        permission_prompt_tool_name=options.permission_prompt_tool_name,
+        permission_mode=options.permission_mode,
+        continue_conversation=options.continue_conversation,
+        resume=options.resume,
+        settings=options.settings,
+        add_dirs=tuple(str(directory) for directory in options.add_dirs),
+        mcp_config=_mcp_config_arg(options),
+        include_partial_messages=options.include_partial_messages,
+        fork_session=options.fork_session,
+        max_thinking_tokens=options.max_thinking_tokens,
+        agents=_agents_arg(options),
+        setting_sources=(
+            ",".join(options.setting_sources)
+            if options.setting_sources is not None
+            else ""
+        ),
+        extra_args=tuple(options.extra_args.items()),
+    )
+
+
+def _format_command(spec: _CommandSpec) -> str:
+    cmd = [spec.cli_binary, "--output-format", "stream-json", "--verbose"]
+    if spec.system_prompt_flag:
+        cmd.extend(spec.system_prompt_flag)
+    if spec.allowed_tools:
+        cmd.extend(["--allowedTools", ",".join(spec.allowed_tools)])
+    if spec.max_turns:
+        cmd.extend(["--max-turns", str(spec.max_turns)])
+    if spec.disallowed_tools:
+        cmd.extend(["--disallowedTools", ",".join(spec.disallowed_tools)])
+    if spec.model:
+        cmd.extend(["--model", spec.model])
+    if spec.permission_prompt_tool_name:
+        cmd.extend(["--permission-prompt-tool", spec.permission_prompt_tool_name])
+    if spec.permission_mode:
+        cmd.extend(["--permission-mode", spec.permission_mode])
+    if spec.continue_conversation:
+        cmd.append("--continue")
+    if spec.resume:
+        cmd.extend(["--resume", spec.resume])
+    if spec.settings:
+        cmd.extend(["--settings", spec.settings])
+    for directory in spec.add_dirs:
+        cmd.extend(["--add-dir", directory])
+    if spec.mcp_config:
+        cmd.extend(["--mcp-config", spec.mcp_config])
+    if spec.include_partial_messages:
+        cmd.append("--include-partial-messages")
+    if spec.fork_session:
+        cmd.append("--fork-session")
+    if spec.max_thinking_tokens:
+        cmd.extend(["--max-thinking-tokens", str(spec.max_thinking_tokens)])
+    if spec.agents:
+        cmd.extend(["--agents", spec.agents])
+    cmd.extend(["--setting-sources", spec.setting_sources])
+    for flag, value in spec.extra_args:
+        if value is None:
+            cmd.append(f"--{flag}")
+        else:
+            cmd.extend([f"--{flag}", str(value)])
+    # Always use streaming mode for E2B
+    cmd.extend(["--input-format", "stream-json"])
+    # E2B's commands.run only takes a single string that the sandbox runs through a
+    # shell, so arguments (notably MCP/agent JSON) must stay quoted here.
+    return shlex.join(cmd)
+
+
 class E2BSandboxTransport(Transport):
     _SENTINEL = object()
 
@@ -40,9 +204,11 @@ class E2BSandboxTransport(Transport):
         api_key: str,
         prompt: str | AsyncIterable[dict[str, Any]],
         options: ClaudeAgentOptions,
+        sandbox_service: SandboxService | None = None,
     ) -> None:
         self._sandbox_id = sandbox_id
         self._api_key = api_key
+        self._sandbox_service = sandbox_service
         self._prompt = prompt
         self._options = options
         self._is_streaming = True
@@ -58,6 +224,9 @@ class E2BSandboxTransport(Transport):
         self._stdout_queue: asyncio.Queue[str | object] = asyncio.Queue(
             maxsize=_STDOUT_QUEUE_MAXSIZE
         )
+        self._stdout_pending: list[str] = []
+        self._stdout_pending_size = 0
+        self._stdout_flush_timer: asyncio.TimerHandle | None = None
         self._ready = False
         self._exit_error: Exception | None = None
         self._stdin_closed = False
@@ -87,31 +256,31 @@ class E2BSandboxTransport(Transport):
             return
         self._stdin_closed = False
         try:
-            self._sandbox = await AsyncSandbox.connect(
-                sandbox_id=self._sandbox_id,
-                api_key=self._api_key,
-                auto_pause=True,
-                timeout=SANDBOX_AUTO_PAUSE_TIMEOUT,
-            )
+            # Reuse the service's connection when one is supplied so consecutive
+            # transports for the same chat turn skip the connect handshake.
+            if self._sandbox_service is not None:
+                self._sandbox = await self._sandbox_service.get_or_connect_sandbox(
+                    self._sandbox_id
+                )
+            else:
+                self._sandbox = await AsyncSandbox.connect(
+                    sandbox_id=self._sandbox_id,
+                    api_key=self._api_key,
+                    auto_pause=True,
+                    timeout=SANDBOX_AUTO_PAUSE_TIMEOUT,
+                )
         except Exception as exc:
             raise CLIConnectionError(
                 f"Failed to connect to sandbox {self._sandbox_id}: {exc}"
             ) from exc
 
         command_line = self._build_command()
-        envs = {
-            "CLAUDE_CODE_ENTRYPOINT": "sdk-py",
-            "CLAUDE_AGENT_SDK_VERSION": sdk_version,
-            "CLAUDE_CODE_SANDBOX": "1",
-            "PYTHONUNBUFFERED": "1",
+        envs = _STATIC_ENVS | {
+            key: str(value) for key, value in (self._options.env or {}).items()
         }
-        envs.update(self._options.env or {})
         cwd = str(self._options.cwd) if self._options.cwd else "/home/user"
         user = self._options.user or "user"
 
-        async def on_stdout(data: str) -> None:
-            await self._stdout_queue.put(data)
-
         async def on_stderr(data: str) -> None:
             if self._options.stderr:
                 try:
@@ -124,11 +293,11 @@ class E2BSandboxTransport(Transport):
             self._command = await self._sandbox.commands.run(
                 command_line,
                 background=True,
-                envs={key: str(value) for key, value in envs.items()},
+                envs=envs,
                 cwd=cwd,
                 user=user,
                 timeout=0,  # Do not auto-disconnect long-lived process
-                on_stdout=on_stdout,
+                on_stdout=self._on_stdout,
                 on_stderr=on_stderr,
             )
         except Exception as exc:
@@ -149,6 +318,9 @@ class E2BSandboxTransport(Transport):
                 await self._command.kill()
             self._command = None
         self._stdin_closed = False
+        if self._stdout_flush_timer is not None:
+            self._stdout_flush_timer.cancel()
+            self._stdout_flush_timer = None
         try:
             self._stdout_queue.put_nowait(self._SENTINEL)
         except asyncio.QueueFull:
@@ -184,88 +356,134 @@ class E2BSandboxTransport(Transport):
     def is_ready(self) -> bool:
         return self._ready
 
+    async def _on_stdout(self, data: str) -> None:
+        # Coalesces small stdout callbacks into one queue item per line batch so the
+        # parser is woken far less often. E2B awaits this callback serially, so no
+        # new data can arrive while a flush is waiting for queue space.
+        self._stdout_pending.append(data)
+        self._stdout_pending_size += len(data)
+        if "\n" in data or self._stdout_pending_size >= _STDOUT_FLUSH_SIZE:
+            await self._flush_stdout()
+        elif self._stdout_flush_timer is None:
+            self._stdout_flush_timer = asyncio.get_running_loop().call_later(
+                _STDOUT_FLUSH_DELAY_SECONDS, self._flush_stdout_nowait
+            )
+
+    def _take_stdout_pending(self) -> str:
+        if self._stdout_flush_timer is not None:
+            self._stdout_flush_timer.cancel()
+            self._stdout_flush_timer = None
+        data = "".join(self._stdout_pending)
+        self._stdout_pending = []
+        self._stdout_pending_size = 0
+        return data
+
+    async def _flush_stdout(self) -> None:
+        if self._stdout_pending:
+            await self._stdout_queue.put(self._take_stdout_pending())
+
+    def _flush_stdout_nowait(self) -> None:
+        # Timer fallback for output that is not newline-terminated.
+        self._stdout_flush_timer = None
+        if not self._stdout_pending:
+            return
+        if self._stdout_queue.full():
+            self._stdout_flush_timer = asyncio.get_running_loop().call_later(
+                _STDOUT_FLUSH_DELAY_SECONDS, self._flush_stdout_nowait
+            )
+            return
+        self._stdout_queue.put_nowait(self._take_stdout_pending())
+
     async def _parse_cli_output(self) -> AsyncIterator[dict[str, Any]]:
         # Stream-based JSON parser that processes Claude CLI output incrementally.
         # The CLI outputs newline-delimited JSON messages, but terminal output may contain
         # ANSI escape codes (colors, cursor movement) that must be stripped before parsing.
-        # Uses a state machine: json_started tracks if we've found the first '{' or '[',
+        # Uses a state machine: state.started tracks if we've found the first '{' or '[',
         # allowing us to skip any non-JSON preamble from the CLI startup.
         if not self._ready and not self._monitor_task:
             raise CLIConnectionError("Transport is not connected")
-        json_buffer = ""
-        json_started = False
-        should_stop = False
+        state = _JsonStreamState()
         while True:
             chunk = await self._stdout_queue.get()
 
             if chunk is self._SENTINEL:
                 break
-            if not isinstance(chunk, str):
-                continue
 
             # Strip ANSI escape codes (e.g., \x1B[32m for colors) that terminals inject.
-            # These codes break JSON parsing if not removed.
-            clean_chunk = _ANSI_ESCAPE_RE.sub("", chunk)
+            # These codes break JSON parsing if not removed. Most chunks carry none, so
+            # a substring check avoids running the regex over them.
+            clean_chunk = cast(str, chunk)
+            if "\x1b" in clean_chunk:
+                clean_chunk = _ANSI_ESCAPE_RE.sub("", clean_chunk)
             clean_chunk = clean_chunk.replace("\r", "")
 
-            json_lines = clean_chunk.split("\n")
-            for json_line in json_lines:
-                json_line = json_line.strip()
-                if not json_line:
-                    continue
-                if not json_started:
-                    first_brace_positions = [
-                        pos
-                        for pos in (json_line.find("{"), json_line.find("["))
-                        if pos != -1
-                    ]
-                    if not first_brace_positions:
-                        continue
-                    json_line = json_line[min(first_brace_positions) :]
-                    json_started = True
-                if not json_started:
-                    continue
-                json_buffer += json_line
-                if len(json_buffer) > self._max_buffer_size:
-                    json_buffer = ""
-                    raise CLIJSONDecodeError(
-                        json_line,
-                        ValueError(
-                            f"CLI output exceeded max buffer size of {self._max_buffer_size}"
-                        ),
-                    )
-                json_buffer, parsed_messages = self._parse_json_buffer(json_buffer)
-                if parsed_messages:
-                    for data in parsed_messages:
-                        yield data
-                        if isinstance(data, dict) and data.get("type") == "result":
-                            json_buffer = ""
-                            should_stop = True
-                            break
-                    if not json_buffer:
-                        json_started = False
-                if should_stop:
-                    break
-            if should_stop:
+            for data in self._process_chunk(clean_chunk, state):
+                yield data
+            if state.finished:
                 break
-        if json_buffer:
-            leftover, parsed_messages = self._parse_json_buffer(json_buffer)
+        if state.parts:
+            leftover, parsed_messages = self._parse_json_buffer("".join(state.parts))
             for data in parsed_messages:
                 yield data
             if leftover.strip():
                 try:
-                    json.loads(leftover)
-                except json.JSONDecodeError as exc:
+                    orjson.loads(leftover)
+                except orjson.JSONDecodeError as exc:
                     raise CLIJSONDecodeError(leftover, exc) from exc
         if self._exit_error:
             raise self._exit_error
 
+    def _process_chunk(self, chunk: str, state: _JsonStreamState) -> Iterator[Any]:
+        # Yields every message completed by this chunk and returns as soon as the
+        # "result" message is seen, marking the stream finished for the caller.
+        for json_line in chunk.split("\n"):
+            json_line = json_line.strip()
+            if not json_line:
+                continue
+            if not state.started:
+                json_start = _JSON_START_RE.search(json_line)
+                if json_start is None:
+                    continue
+                json_line = json_line[json_start.start() :]
+                state.started = True
+            state.parts.append(json_line)
+            state.length += len(json_line)
+            if state.length > self._max_buffer_size:
+                state.parts = []
+                state.length = 0
+                raise CLIJSONDecodeError(
+                    json_line,
+                    ValueError(
+                        f"CLI output exceeded max buffer size of {self._max_buffer_size}"
+                    ),
+                )
+            if json_line[-1] not in "}]":
+                continue
+            json_buffer, parsed_messages = self._parse_json_buffer("".join(state.parts))
+            state.parts = [json_buffer] if json_buffer else []
+            state.length = len(json_buffer)
+            for data in parsed_messages:
+                if isinstance(data, dict) and data.get("type") == "result":
+                    state.parts = []
+                    state.finished = True
+                    yield data
+                    return
+                yield data
+            if parsed_messages and not state.parts:
+                state.started = False
+
     def _parse_json_buffer(self, buffer: str) -> tuple[str, list[Any]]:
         # Parses concatenated JSON objects from a buffer, returning unparsed remainder.
         # Uses raw_decode instead of json.loads because the buffer may contain multiple
         # JSON objects back-to-back (e.g., '{"a":1}{"b":2}'). json.loads would fail on this,
         # but raw_decode returns the offset where parsing stopped, allowing us to extract
         # each object one at a time and preserve any incomplete trailing data for the next chunk.
+        # The common case is a buffer holding exactly one message, which orjson decodes
+        # much faster; raw_decode is only needed when that attempt fails.
+        # Unlike raw_decode, orjson turns integers beyond 64 bits into floats. That loss
+        # is accepted: CLI counters and ids fit in 64 bits, and anything larger would be
+        # rounded to a double by the browser anyway. Scanning for long digit runs to
+        # avoid it would cost more than the faster decode saves.
         messages: list[Any] = []
         working = buffer
         while working:
@@ -273,6 +491,16 @@ class E2BSandboxTransport(Transport):
             leading = len(working) - len(stripped)
             if leading:
                 working = stripped
+            # Only objects and arrays are valid CLI messages; bail out before entering
+            # the decoder when the value cannot start here or cannot be complete yet.
+            closer = _JSON_CLOSERS.get(working[:1])
+            if closer is None or closer not in working:
+                break
+            try:
+                messages.append(orjson.loads(working))
+                return "", messages
+            except orjson.JSONDecodeError:
+                pass
             try:
                 data, offset = self._json_decoder.raw_decode(working)
             except json.JSONDecodeError:
@@ -298,6 +526,7 @@ class E2BSandboxTransport(Transport):
             )
         finally:
             try:
+                await self._flush_stdout()
                 await self._stdout_queue.put(self._SENTINEL)
             except asyncio.CancelledError:  # pragma: no cover - defensive
                 pass
@@ -306,91 +535,4 @@ class E2BSandboxTransport(Transport):
             self._ready = False
 
     def _build_command(self) -> str:
-        cli_binary = str(self._options.cli_path) if self._options.cli_path else "claude"
-        cmd = [cli_binary, "--output-format", "stream-json", "--verbose"]
-        if self._options.system_prompt is None:
-            pass
-        elif isinstance(self._options.system_prompt, str):
-            cmd.extend(["--system-prompt", self._options.system_prompt])
-        else:
-            if (
-                self._options.system_prompt.get("type") == "preset"
-                and "append" in self._options.system_prompt
-            ):
-                cmd.extend(
-                    ["--append-system-prompt", self._options.system_prompt["append"]]
-                )
-        if self._options.allowed_tools:
-            cmd.extend(["--allowedTools", ",".join(self._options.allowed_tools)])
-        if self._options.max_turns:
-            cmd.extend(["--max-turns", str(self._options.max_turns)])
-        if self._options.disallowed_tools:
-            cmd.extend(["--disallowedTools", ",".join(self._options.disallowed_tools)])
-        if self._options.model:
-            cmd.extend(["--model", self._options.model])
-        if self._options.permission_prompt_tool_name:
-            cmd.extend(
-                [
-                    "--permission-prompt-tool",
-                    self._options.permission_prompt_tool_name,
-                ]
-            )
-        if self._options.permission_mode:
-            cmd.extend(["--permission-mode", self._options.permission_mode])
-        if self._options.continue_conversation:
-            cmd.append("--continue")
-        if self._options.resume:
-            cmd.extend(["--resume", self._options.resume])
-        if self._options.settings:
-            cmd.extend(["--settings", self._options.settings])
-        for directory in self._options.add_dirs:
-            cmd.extend(["--add-dir", str(directory)])
-        if self._options.mcp_servers:
-            if isinstance(self._options.mcp_servers, dict):
-                servers_for_cli: dict[str, Any] = {}
-                for name, config in self._options.mcp_servers.items():
-                    if isinstance(config, dict) and config.get("type") == "sdk":
-                        servers_for_cli[name] = {
-                            key: value
-                            for key, value in config.items()
-                            if key != "instance"
-                        }
-                    else:
-                        servers_for_cli[name] = config
-                if servers_for_cli:
-                    cmd.extend(
-                        [
-                            "--mcp-config",
-                            json.dumps({"mcpServers": servers_for_cli}),
-                        ]
-                    )
-            else:
-                cmd.extend(["--mcp-config", str(self._options.mcp_servers)])
-        if self._options.include_partial_messages:
-            cmd.append("--include-partial-messages")
-        if self._options.fork_session:
-            cmd.append("--fork-session")
-        if self._options.max_thinking_tokens:
-            cmd.extend(
-                ["--max-thinking-tokens", str(self._options.max_thinking_tokens)]
-            )
-        if self._options.agents:
-            agents_dict = {
-                name: {k: v for k, v in asdict(agent_def).items() if v is not None}
-                for name, agent_def in self._options.agents.items()
-            }
-            cmd.extend(["--agents", json.dumps(agents_dict)])
-        sources_value = (
-            ",".join(self._options.setting_sources)
-            if self._options.setting_sources is not None
-            else ""
-        )
-        cmd.extend(["--setting-sources", sources_value])
-        for flag, value in self._options.extra_args.items():
-            if value is None:
-                cmd.append(f"--{flag}")
-            else:
-                cmd.extend([f"--{flag}", str(value)])
-        # Always use streaming mode for E2B
-        cmd.extend(["--input-format", "stream-json"])
-        return shlex.join(cmd)
+        return _format_command(_command_spec(self._options))
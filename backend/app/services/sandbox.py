@@ -9,6 +9,7 @@ import shlex
 import uuid
 import zipfile
 from asyncio import QueueEmpty, QueueFull
+from collections.abc import AsyncIterator
 from contextlib import suppress
 from datetime import datetime
 from pathlib import Path, PurePosixPath
@@ -188,6 +189,25 @@ BINARY_EXTENSIONS: set[str] = {
 }
 
 
+class _ZipChunkStream(io.RawIOBase):
+    # Write-only sink for zipfile; being unseekable makes ZipFile emit data
+    # descriptors so finished entries can be drained and streamed immediately.
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
 class PtyDataCallback:
     def __init__(
         self, service: "SandboxService", output_queue: "asyncio.Queue[str]"
@@ -690,35 +710,42 @@ class SandboxService:
 
         return secrets
 
-    async def generate_zip_download(self, sandbox_id: str) -> bytes:
+    async def stream_zip_download(self, sandbox_id: str) -> AsyncIterator[bytes]:
+        # Resolves the sandbox and file list up front so connection errors surface
+        # before the response starts; the archive itself is produced file by file.
         sandbox = await self.get_or_connect_sandbox(sandbox_id)
-
         metadata_items = await self.get_files_metadata(sandbox_id)
+        return self._iter_zip_chunks(sandbox, metadata_items)
 
-        zip_buffer = io.BytesIO()
+    async def _iter_zip_chunks(
+        self, sandbox: AsyncSandbox, metadata_items: list[dict[str, Any]]
+    ) -> AsyncIterator[bytes]:
+        stream = _ZipChunkStream()
 
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as zip_file:
             for item in metadata_items:
-                if item["type"] == "file":
-                    file_path = item["path"]
+                if item["type"] != "file":
+                    continue
+                file_path = item["path"]
 
-                    try:
-                        content, is_binary = await self._read_file_content(
-                            sandbox, file_path
-                        )
+                try:
+                    content = await self._retry_operation(
+                        sandbox.files.read,
+                        self.normalize_path(file_path),
+                        format="bytes",
+                    )
+                    zip_file.writestr(file_path, bytes(content))
+                except Exception as e:
+                    logger.warning("Failed to write file %s to zip: %s", file_path, e)
+                    continue
 
-                        if is_binary:
-                            zip_file.writestr(file_path, base64.b64decode(content))
-                        else:
-                            zip_file.writestr(file_path, content.encode("utf-8"))
-                    except Exception as e:
-                        logger.warning(
-                            "Failed to write file %s to zip: %s", file_path, e
-                        )
-                        continue
+                chunk = stream.drain()
+                if chunk:
+                    yield chunk
 
-        zip_buffer.seek(0)
-        return zip_buffer.read()
+        chunk = stream.drain()
+        if chunk:
+            yield chunk
 
     async def _copy_all_resources_to_sandbox(
         self,
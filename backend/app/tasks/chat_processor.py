@@ -7,6 +7,7 @@ from copy import deepcopy
 from dataclasses import dataclass
 from typing import AsyncIterator, Any
 
+import uvloop
 from celery.exceptions import Ignore
 from redis.asyncio import Redis
 from sqlalchemy import select
@@ -613,7 +614,7 @@ def process_chat(
     thinking_mode: str | None = None,
     attachments: list[dict[str, Any]] | None = None,
 ) -> str:
-    loop = asyncio.new_event_loop()
+    loop = uvloop.new_event_loop()
     asyncio.set_event_loop(loop)
 
     try:
@@ -22,6 +22,30 @@ async def redis_connection() -> "AsyncIterator[Redis[str]]":
             logger.warning("Error closing Redis connection: %s", e)
 
 
+# Long-lived pooled client for hot API paths, where opening a connection per call
+# would cost as much as the lookup itself. Celery tasks run each task on a new event
+# loop and must keep using redis_connection().
+_shared_redis: "Redis[str] | None" = None
+
+
+def get_shared_redis() -> "Redis[str]":
+    global _shared_redis
+    if _shared_redis is None:
+        _shared_redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _shared_redis
+
+
+async def close_shared_redis() -> None:
+    global _shared_redis
+    if _shared_redis is None:
+        return
+    try:
+        await _shared_redis.close()
+    except Exception as e:
+        logger.warning("Error closing shared Redis client: %s", e)
+    _shared_redis = None
+
+
 @asynccontextmanager
 async def redis_pubsub(redis: "Redis[str]", channel: str) -> AsyncIterator[PubSub]:
     pubsub = redis.pubsub()
@@ -16,7 +16,7 @@ if [ "$MODE" = "api" ]; then
     cd /app && python seed_data.py
 
     echo "Starting API server..."
-    exec gosu appuser sh -c "ulimit -s 65536 && exec granian --interface asgi app.main:app --host 0.0.0.0 --port ${PORT:-8080} --workers $(nproc) --runtime-threads 32 --runtime-mode mt"
+    exec gosu appuser sh -c "ulimit -s 65536 && exec granian --interface asgi --loop uvloop app.main:app --host 0.0.0.0 --port ${PORT:-8080} --workers $(nproc) --runtime-threads 32 --runtime-mode mt"
 fi
 
 if [ "$MODE" = "celery-worker" ]; then
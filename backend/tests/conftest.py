@@ -9,9 +9,11 @@ from typing import Any, AsyncGenerator, Callable, Generator
 import pytest
 import pytest_asyncio
 from e2b import AsyncSandbox
+from fastapi_users.authentication import JWTStrategy
 from filelock import FileLock
-from httpx import ASGITransport, AsyncClient
+from httpx import ASGITransport, AsyncClient, Limits
 from redis.asyncio import Redis
+from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
@@ -59,6 +61,11 @@ settings = get_settings()
 TEST_PASSWORD = "testpassword"
 TEST_PASSWORD_ALT = "testpassword123"
 STREAMING_TEST_TIMEOUT = 180
+SHARED_TOKEN_LIFETIME_SECONDS = 24 * 60 * 60
+# Local opt-in: keep each worker's sandbox alive between runs and reconnect to it.
+REUSE_TEST_SANDBOX = os.environ.get(
+    "CLAUDEX_CACHE_TEST_SANDBOX"
+) == "1" and not os.environ.get("CI")
 
 ChatServiceClass = type[ChatService]
 
@@ -202,8 +209,16 @@ async def redis_client():
         await redis.close()
 
 
+@pytest.fixture(autouse=True)
+def clear_ai_model_cache() -> Generator[None, None, None]:
+    # The service caches live on the class, so they outlast each test in a worker.
+    AIModelService.clear_local_cache()
+    yield
+    AIModelService.clear_local_cache()
+
+
 def create_e2e_application(
-    db_session: AsyncSession,
+    db_session: AsyncSession | None,
     sandbox_service: SandboxService,
     session_factory: Callable[[], Any],
     chat_service_cls: ChatServiceClass = ChatService,
@@ -211,7 +226,11 @@ def create_e2e_application(
     application = create_application()
 
     async def override_get_db():
-        yield db_session
+        if db_session is None:
+            async with session_factory() as session:
+                yield session
+        else:
+            yield db_session
 
     async def override_get_sandbox_service():
         yield sandbox_service
@@ -332,8 +351,9 @@ class TestChatService(ChatService):
 
 
 class SessionSandboxManager:
-    def __init__(self, e2b_api_key: str):
+    def __init__(self, e2b_api_key: str, worker_id: str = "master"):
         self.e2b_api_key = e2b_api_key
+        self.worker_id = worker_id
         self.sandbox_id: str | None = None
         self.sandbox: AsyncSandbox | None = None
         self.service = SandboxService(e2b_api_key=e2b_api_key)
@@ -350,13 +370,19 @@ class SessionSandboxManager:
                 self.service._active_sandboxes[self.sandbox_id] = self.sandbox
                 return self.sandbox_id, self.sandbox
             except Exception:
-                pass
+                # Kill the unreachable sandbox before replacing it so a failed reuse
+                # never leaves a paused sandbox behind on the account.
+                try:
+                    await AsyncSandbox.kill(self.sandbox_id, api_key=self.e2b_api_key)
+                except Exception:
+                    pass
 
         self.sandbox = await AsyncSandbox.create(
             api_key=self.e2b_api_key,
             template=settings.E2B_TEMPLATE_ID,
             timeout=SANDBOX_AUTO_PAUSE_TIMEOUT,
             auto_pause=True,
+            metadata={"pytest_worker": self.worker_id},
         )
         self.sandbox_id = self.sandbox.sandbox_id
         self.service._active_sandboxes[self.sandbox_id] = self.sandbox
@@ -413,14 +439,25 @@ async def seed_ai_models(db_session: AsyncSession) -> None:
 
 @pytest_asyncio.fixture(scope="session")
 async def sandbox_manager(
+    request: pytest.FixtureRequest,
     e2b_api_key: str,
+    worker_id: str,
 ) -> AsyncGenerator[SessionSandboxManager, None]:
-    manager = SessionSandboxManager(e2b_api_key)
+    # Session scope is per xdist worker, so each worker drives its own sandbox and
+    # tests sharing it never race with another worker's writes.
+    manager = SessionSandboxManager(e2b_api_key, worker_id)
+    cache = getattr(request.config, "cache", None) if REUSE_TEST_SANDBOX else None
+    cache_key = f"claudex/sandbox/{settings.E2B_TEMPLATE_ID}/{worker_id}"
+    if cache is not None:
+        manager.sandbox_id = cache.get(cache_key, None)
     await manager.get_sandbox()
     try:
         yield manager
     finally:
-        await manager.cleanup()
+        if cache is not None:
+            cache.set(cache_key, manager.sandbox_id)
+        else:
+            await manager.cleanup()
 
 
 @pytest_asyncio.fixture
@@ -431,12 +468,8 @@ async def real_sandbox(
     yield sandbox_manager.service, sandbox_id
 
 
-@pytest_asyncio.fixture
-async def integration_user_fixture(
-    db_session: AsyncSession,
-    e2b_api_key: str,
-    claude_token: str,
-    seed_ai_models: None,
+async def _create_integration_user(
+    db_session: AsyncSession, e2b_api_key: str, claude_token: str
 ) -> User:
     user = User(
         id=uuid.uuid4(),
@@ -463,6 +496,16 @@ async def integration_user_fixture(
     return user
 
 
+@pytest_asyncio.fixture
+async def integration_user_fixture(
+    db_session: AsyncSession,
+    e2b_api_key: str,
+    claude_token: str,
+    seed_ai_models: None,
+) -> User:
+    return await _create_integration_user(db_session, e2b_api_key, claude_token)
+
+
 @pytest_asyncio.fixture
 async def integration_chat_fixture(
     db_session: AsyncSession,
@@ -536,3 +579,107 @@ async def streaming_client(
         timeout=120.0,
     ) as ac:
         yield ac
+
+
+# Shared fixtures commit real rows so one user, chat and app can serve a whole module
+# (and concurrent requests) instead of being rebuilt inside every test's transaction.
+# Tests that write files or secrets must leave the sandbox as they found it; apply
+# sandbox_reset to them.
+@pytest_asyncio.fixture(scope="session")
+async def shared_user(
+    _setup_test_database,
+    e2b_api_key: str,
+    claude_token: str,
+) -> AsyncGenerator[User, None]:
+    async with TestSessionLocal() as session:
+        user = await _create_integration_user(session, e2b_api_key, claude_token)
+    try:
+        yield user
+    finally:
+        async with TestSessionLocal() as session:
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+
+
+@pytest_asyncio.fixture(scope="module")
+async def shared_chat(
+    shared_user: User,
+    sandbox_manager: SessionSandboxManager,
+) -> AsyncGenerator[tuple[User, Chat, SandboxService], None]:
+    sandbox_id, _ = await sandbox_manager.get_sandbox()
+    chat = Chat(
+        id=uuid.uuid4(),
+        title="Shared Integration Test Chat",
+        user_id=shared_user.id,
+        sandbox_id=sandbox_id,
+    )
+    async with TestSessionLocal() as session:
+        session.add(chat)
+        await session.commit()
+        await session.refresh(chat)
+    try:
+        yield shared_user, chat, sandbox_manager.service
+    finally:
+        async with TestSessionLocal() as session:
+            await session.execute(delete(Chat).where(Chat.id == chat.id))
+            await session.commit()
+
+
+@pytest.fixture(scope="module")
+def shared_sandbox_url(shared_chat: tuple[User, Chat, SandboxService]) -> str:
+    _, chat, _ = shared_chat
+    return f"/api/v1/sandbox/{chat.sandbox_id}"
+
+
+@pytest_asyncio.fixture(scope="module")
+async def shared_e2e_app(
+    sandbox_manager: SessionSandboxManager,
+    shared_chat: tuple[User, Chat, SandboxService],
+):
+    yield create_e2e_application(None, sandbox_manager.service, TestSessionLocal)
+
+
+@pytest_asyncio.fixture(scope="module")
+async def shared_client(shared_e2e_app) -> AsyncGenerator[AsyncClient, None]:
+    async with AsyncClient(
+        transport=ASGITransport(app=shared_e2e_app),
+        base_url="http://test",
+        limits=Limits(max_keepalive_connections=20, max_connections=50),
+    ) as ac:
+        yield ac
+
+
+@pytest_asyncio.fixture(scope="session")
+async def shared_auth_headers(shared_user: User) -> dict[str, str]:
+    # Minted once per session, so it must outlive the default access-token lifetime.
+    strategy = JWTStrategy(
+        secret=settings.SECRET_KEY,
+        lifetime_seconds=SHARED_TOKEN_LIFETIME_SECONDS,
+        algorithm=settings.ALGORITHM,
+    )
+    token = await strategy.write_token(shared_user)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest_asyncio.fixture
+async def sandbox_reset(
+    shared_chat: tuple[User, Chat, SandboxService],
+) -> AsyncGenerator[None, None]:
+    _, chat, service = shared_chat
+    sandbox_id = str(chat.sandbox_id)
+    sandbox = await service.get_or_connect_sandbox(sandbox_id)
+
+    files_before = {entry.path for entry in await sandbox.files.list("/home/user")}
+    secrets_before = {
+        secret["key"]
+        for secret in await service.get_secrets(sandbox_id, sandbox=sandbox)
+    }
+
+    yield
+
+    for entry in await sandbox.files.list("/home/user"):
+        if entry.path not in files_before:
+            await sandbox.files.remove(entry.path)
+    for secret in await service.get_secrets(sandbox_id, sandbox=sandbox):
+        if secret["key"] not in secrets_before:
+            await service.delete_secret(sandbox_id, secret["key"])
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable
+
+import pytest_asyncio
+from redis.asyncio import Redis
+
+from app.constants import REDIS_KEY_MODELS_LIST
+from app.models.db_models.ai_model import AIModel
+from app.models.db_models.enums import ModelProvider
+from app.services.ai_model import AIModelService
+
+
+@pytest_asyncio.fixture
+async def ai_model_service(
+    session_factory: Callable[[], Any], seed_ai_models: None
+) -> AIModelService:
+    return AIModelService(session_factory=session_factory)
+
+
+class TestAIModelCache:
+    async def test_get_model_provider(self, ai_model_service: AIModelService) -> None:
+        provider = await ai_model_service.get_model_provider("claude-haiku-4-5")
+
+        assert provider == ModelProvider.ANTHROPIC
+        assert "claude-haiku-4-5" in AIModelService._providers_by_id
+        assert await ai_model_service.get_model_provider("missing-model") is None
+
+    async def test_expired_entry_is_reloaded(
+        self, ai_model_service: AIModelService
+    ) -> None:
+        stale = AIModel(
+            model_id="claude-haiku-4-5",
+            name="Stale",
+            provider=ModelProvider.OPENROUTER,
+        )
+        AIModelService._models_by_id["claude-haiku-4-5"] = (
+            time.monotonic() - 1,
+            stale,
+        )
+
+        model = await ai_model_service.get_model_by_model_id("claude-haiku-4-5")
+
+        assert model is not None
+        assert model is not stale
+        assert model.provider == ModelProvider.ANTHROPIC
+        expires_at, cached = AIModelService._models_by_id["claude-haiku-4-5"]
+        assert cached is model
+        assert expires_at > time.monotonic()
+
+    async def test_redis_hit_fills_local_cache(
+        self, ai_model_service: AIModelService, redis_client: Redis[str]
+    ) -> None:
+        await ai_model_service.get_models(redis=redis_client)
+        AIModelService.clear_local_cache()
+
+        models = await ai_model_service.get_models(redis=redis_client)
+
+        _, cached = AIModelService._models_list[True]
+        assert cached == models
+        assert {m.model_id for m in models} >= {"claude-haiku-4-5", "claude-sonnet-4-5"}
+
+    async def test_invalidate_cache_clears_local_and_redis(
+        self, ai_model_service: AIModelService, redis_client: Redis[str]
+    ) -> None:
+        await ai_model_service.get_models(active_only=True, redis=redis_client)
+        await ai_model_service.get_models(active_only=False, redis=redis_client)
+        await ai_model_service.get_model_provider("claude-haiku-4-5")
+        active_key = REDIS_KEY_MODELS_LIST.format(active_only=True)
+        all_key = REDIS_KEY_MODELS_LIST.format(active_only=False)
+        assert await redis_client.exists(active_key, all_key) == 2
+
+        await AIModelService.invalidate_cache()
+
+        assert await redis_client.exists(active_key, all_key) == 0
+        assert AIModelService._models_list == {}
+        assert AIModelService._models_by_id == {}
+        assert AIModelService._providers_by_id == {}
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any, Callable
+from unittest.mock import AsyncMock
+
+import pytest_asyncio
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import REDIS_KEY_SANDBOX_ACCESS
+from app.core.security import get_password_hash
+from app.models.db_models import Chat, User
+from app.services.chat import ChatService
+from app.services.claude_agent import ClaudeAgentService
+from app.services.storage import StorageService
+from app.services.user import UserService
+from tests.conftest import TEST_PASSWORD
+
+
+@pytest_asyncio.fixture
+async def chat_service(session_factory: Callable[[], Any]) -> ChatService:
+    sandbox_service = AsyncMock()
+    return ChatService(
+        StorageService(sandbox_service),
+        sandbox_service,
+        ClaudeAgentService(session_factory=session_factory),
+        UserService(session_factory=session_factory),
+        session_factory=session_factory,
+    )
+
+
+@pytest_asyncio.fixture
+async def sandbox_chat(db_session: AsyncSession, sample_user: User) -> Chat:
+    chat = Chat(
+        id=uuid.uuid4(),
+        title="Sandbox Access Chat",
+        user_id=sample_user.id,
+        sandbox_id=f"sandbox-{uuid.uuid4().hex[:8]}",
+    )
+    db_session.add(chat)
+    await db_session.flush()
+    return chat
+
+
+@pytest_asyncio.fixture
+async def other_user(db_session: AsyncSession) -> User:
+    user = User(
+        id=uuid.uuid4(),
+        email=f"other_{uuid.uuid4().hex[:8]}@example.com",
+        username=f"other_{uuid.uuid4().hex[:8]}",
+        hashed_password=get_password_hash(TEST_PASSWORD),
+        is_active=True,
+        is_verified=True,
+    )
+    db_session.add(user)
+    await db_session.flush()
+    return user
+
+
+class TestCheckSandboxAccess:
+    async def test_missing_sandbox(
+        self, chat_service: ChatService, sample_user: User
+    ) -> None:
+        result = await chat_service.check_sandbox_access(
+            "missing-sandbox", sample_user.id
+        )
+
+        assert result == (False, False)
+
+    async def test_other_users_sandbox(
+        self, chat_service: ChatService, sandbox_chat: Chat, other_user: User
+    ) -> None:
+        result = await chat_service.check_sandbox_access(
+            str(sandbox_chat.sandbox_id), other_user.id
+        )
+
+        assert result == (True, False)
+
+    async def test_own_sandbox(
+        self, chat_service: ChatService, sandbox_chat: Chat, sample_user: User
+    ) -> None:
+        result = await chat_service.check_sandbox_access(
+            str(sandbox_chat.sandbox_id), sample_user.id
+        )
+
+        assert result == (True, True)
+
+    async def test_delete_chat_revokes_cached_grant(
+        self,
+        chat_service: ChatService,
+        sandbox_chat: Chat,
+        sample_user: User,
+        redis_client: Redis[str],
+    ) -> None:
+        sandbox_id = str(sandbox_chat.sandbox_id)
+        cache_key = REDIS_KEY_SANDBOX_ACCESS.format(
+            sandbox_id=sandbox_id, user_id=sample_user.id
+        )
+
+        assert await chat_service.check_sandbox_access(
+            sandbox_id, sample_user.id, redis=redis_client
+        ) == (True, True)
+        assert await redis_client.get(cache_key) == "1"
+
+        await chat_service.delete_chat(sandbox_chat.id, sample_user)
+
+        assert await redis_client.get(cache_key) is None
+        assert await chat_service.check_sandbox_access(
+            sandbox_id, sample_user.id, redis=redis_client
+        ) == (False, False)
+        chat_service.sandbox_service.delete_sandbox.assert_awaited_once_with(sandbox_id)
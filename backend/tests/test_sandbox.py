@@ -1,96 +1,109 @@
 from __future__ import annotations
 
-import uuid
+import asyncio
+from typing import Any
 
+import orjson
 import pytest
-from httpx import AsyncClient
-
-from app.models.db_models import Chat, User
-from app.services.sandbox import SandboxService
-
-
-class TestSandboxPreviewLinks:
-    async def test_get_preview_links(
+from httpx import AsyncClient, Response
+
+
+pytestmark = pytest.mark.integration
+
+_FAKE_SANDBOX_ID = "fake-sandbox-00000000"
+
+_BODY_FILE = orjson.dumps({"file_path": "/test.txt", "content": "test"})
+_BODY_SECRET = orjson.dumps({"key": "TEST", "value": "test"})
+_BODY_THEME = orjson.dumps({"theme": "dark"})
+
+_ENDPOINTS: tuple[tuple[str, str, bytes | None], ...] = (
+    ("GET", "/files/metadata", None),
+    ("PUT", "/files", _BODY_FILE),
+    ("GET", "/secrets", None),
+    ("POST", "/secrets", _BODY_SECRET),
+    ("GET", "/download-zip", None),
+    ("GET", "/preview-links", None),
+    ("PUT", "/ide-theme", _BODY_THEME),
+)
+_UNAUTHORIZED_ENDPOINTS = _ENDPOINTS + (
+    ("GET", "/files/content/test.txt", None),
+    ("DELETE", "/secrets/TEST", None),
+)
+
+_METHOD_DISPATCH = {
+    "GET": AsyncClient.get,
+    "PUT": AsyncClient.put,
+    "POST": AsyncClient.post,
+    "DELETE": AsyncClient.delete,
+}
+
+
+async def _send_request(
+    client: AsyncClient,
+    method: str,
+    endpoint: str,
+    body: bytes | None,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    kwargs: dict[str, Any] = {"headers": headers}
+    if body is not None:
+        kwargs["content"] = body
+        kwargs["headers"] = {**(headers or {}), "Content-Type": "application/json"}
+    return await _METHOD_DISPATCH[method](client, endpoint, **kwargs)
+
+
+class TestSandboxReadEndpoints:
+    async def test_readonly_endpoints_shape(
         self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-        auth_headers: dict[str, str],
+        shared_client: AsyncClient,
+        shared_sandbox_url: str,
+        shared_auth_headers: dict[str, str],
     ) -> None:
-        _, chat, _ = integration_chat_fixture
-
-        response = await async_client.get(
-            f"/api/v1/sandbox/{chat.sandbox_id}/preview-links",
-            headers=auth_headers,
+        links_response, files_response, secrets_response = await asyncio.gather(
+            shared_client.get(
+                shared_sandbox_url + "/preview-links", headers=shared_auth_headers
+            ),
+            shared_client.get(
+                shared_sandbox_url + "/files/metadata", headers=shared_auth_headers
+            ),
+            shared_client.get(
+                shared_sandbox_url + "/secrets", headers=shared_auth_headers
+            ),
         )
 
-        assert response.status_code == 200
-        data = response.json()
-        assert "links" in data
-        assert isinstance(data["links"], list)
+        assert links_response.status_code == 200
+        assert isinstance(orjson.loads(links_response.content).get("links"), list)
 
-    async def test_get_preview_links_unauthorized(
-        self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-    ) -> None:
-        _, chat, _ = integration_chat_fixture
-
-        response = await async_client.get(
-            f"/api/v1/sandbox/{chat.sandbox_id}/preview-links",
-        )
+        assert files_response.status_code == 200
+        assert isinstance(orjson.loads(files_response.content).get("files"), list)
 
-        assert response.status_code == 401
+        assert secrets_response.status_code == 200
+        assert isinstance(orjson.loads(secrets_response.content).get("secrets"), list)
 
 
+@pytest.mark.usefixtures("sandbox_reset")
 class TestSandboxFiles:
-    async def test_get_files_metadata(
-        self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-        auth_headers: dict[str, str],
-    ) -> None:
-        _, chat, _ = integration_chat_fixture
-
-        response = await async_client.get(
-            f"/api/v1/sandbox/{chat.sandbox_id}/files/metadata",
-            headers=auth_headers,
-        )
-
-        assert response.status_code == 200
-        data = response.json()
-        assert "files" in data
-        assert isinstance(data["files"], list)
-
-    async def test_write_file(
+    async def test_write_then_read_file(
         self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-        auth_headers: dict[str, str],
+        shared_client: AsyncClient,
+        shared_sandbox_url: str,
+        shared_auth_headers: dict[str, str],
     ) -> None:
-        _, chat, _ = integration_chat_fixture
         test_path = "/home/user/test_integration.txt"
         test_content = "Integration test content"
 
-        write_response = await async_client.put(
-            f"/api/v1/sandbox/{chat.sandbox_id}/files",
+        write_response = await shared_client.put(
+            shared_sandbox_url + "/files",
             json={"file_path": test_path, "content": test_content},
-            headers=auth_headers,
+            headers=shared_auth_headers,
         )
 
         assert write_response.status_code == 200
         assert write_response.json()["success"] is True
 
-    async def test_get_file_content(
-        self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-        auth_headers: dict[str, str],
-    ) -> None:
-        _, chat, _ = integration_chat_fixture
-
-        response = await async_client.get(
-            f"/api/v1/sandbox/{chat.sandbox_id}/files/content/test_integration.txt",
-            headers=auth_headers,
+        response = await shared_client.get(
+            shared_sandbox_url + "/files/content/test_integration.txt",
+            headers=shared_auth_headers,
         )
 
         assert response.status_code == 200
@@ -98,65 +111,45 @@ class TestSandboxFiles:
         assert "content" in data
         assert "path" in data
         assert data["path"] == "test_integration.txt"
-        assert data["content"] == "Integration test content"
+        assert data["content"] == test_content
 
     async def test_get_file_not_found(
         self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-        auth_headers: dict[str, str],
+        shared_client: AsyncClient,
+        shared_sandbox_url: str,
+        shared_auth_headers: dict[str, str],
     ) -> None:
-        _, chat, _ = integration_chat_fixture
-
-        response = await async_client.get(
-            f"/api/v1/sandbox/{chat.sandbox_id}/files/content/nonexistent/file.txt",
-            headers=auth_headers,
+        response = await shared_client.get(
+            shared_sandbox_url + "/files/content/nonexistent/file.txt",
+            headers=shared_auth_headers,
         )
 
         assert response.status_code == 404
 
 
+@pytest.mark.usefixtures("sandbox_reset")
 class TestSandboxSecrets:
-    async def test_get_secrets(
-        self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-        auth_headers: dict[str, str],
-    ) -> None:
-        _, chat, _ = integration_chat_fixture
-
-        response = await async_client.get(
-            f"/api/v1/sandbox/{chat.sandbox_id}/secrets",
-            headers=auth_headers,
-        )
-
-        assert response.status_code == 200
-        data = response.json()
-        assert "secrets" in data
-        assert isinstance(data["secrets"], list)
-
     async def test_add_and_delete_secret(
         self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-        auth_headers: dict[str, str],
+        shared_client: AsyncClient,
+        shared_sandbox_url: str,
+        shared_auth_headers: dict[str, str],
     ) -> None:
-        _, chat, _ = integration_chat_fixture
         secret_key = "TEST_SECRET_KEY"
         secret_value = "test_secret_value"
 
-        add_response = await async_client.post(
-            f"/api/v1/sandbox/{chat.sandbox_id}/secrets",
+        add_response = await shared_client.post(
+            shared_sandbox_url + "/secrets",
             json={"key": secret_key, "value": secret_value},
-            headers=auth_headers,
+            headers=shared_auth_headers,
         )
 
         assert add_response.status_code == 200
         assert secret_key in add_response.json()["message"]
 
-        delete_response = await async_client.delete(
-            f"/api/v1/sandbox/{chat.sandbox_id}/secrets/{secret_key}",
-            headers=auth_headers,
+        delete_response = await shared_client.delete(
+            f"{shared_sandbox_url}/secrets/{secret_key}",
+            headers=shared_auth_headers,
         )
 
         assert delete_response.status_code == 200
@@ -165,130 +158,87 @@ class TestSandboxSecrets:
 class TestSandboxDownload:
     async def test_download_zip(
         self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-        auth_headers: dict[str, str],
+        shared_client: AsyncClient,
+        shared_sandbox_url: str,
+        shared_auth_headers: dict[str, str],
     ) -> None:
-        _, chat, _ = integration_chat_fixture
-
-        response = await async_client.get(
-            f"/api/v1/sandbox/{chat.sandbox_id}/download-zip",
-            headers=auth_headers,
-        )
-
-        assert response.status_code == 200
-        assert response.headers.get("content-type") == "application/zip"
-        assert len(response.content) > 0
+        async with shared_client.stream(
+            "GET", shared_sandbox_url + "/download-zip", headers=shared_auth_headers
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers.get("content-type") == "application/zip"
+            first_chunk = await anext(response.aiter_bytes())
+            assert len(first_chunk) > 0
 
 
 class TestSandboxIdeTheme:
     async def test_set_ide_theme(
         self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-        auth_headers: dict[str, str],
+        shared_client: AsyncClient,
+        shared_sandbox_url: str,
+        shared_auth_headers: dict[str, str],
     ) -> None:
-        _, chat, _ = integration_chat_fixture
-
-        response = await async_client.put(
-            f"/api/v1/sandbox/{chat.sandbox_id}/ide-theme",
+        response = await shared_client.put(
+            shared_sandbox_url + "/ide-theme",
             json={"theme": "dark"},
-            headers=auth_headers,
+            headers=shared_auth_headers,
         )
 
         assert response.status_code == 200
 
-    async def test_set_ide_theme_unauthorized(
-        self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-    ) -> None:
-        _, chat, _ = integration_chat_fixture
-
-        response = await async_client.put(
-            f"/api/v1/sandbox/{chat.sandbox_id}/ide-theme",
-            json={"theme": "dark"},
-        )
-
-        assert response.status_code == 401
-
 
 class TestSandboxUnauthorized:
-    @pytest.mark.parametrize(
-        "method,endpoint_suffix,json_body",
-        [
-            ("GET", "/files/metadata", None),
-            ("PUT", "/files", {"file_path": "/test.txt", "content": "test"}),
-            ("GET", "/files/content/test.txt", None),
-            ("GET", "/secrets", None),
-            ("POST", "/secrets", {"key": "TEST", "value": "test"}),
-            ("DELETE", "/secrets/TEST", None),
-            ("GET", "/download-zip", None),
-        ],
-    )
     async def test_sandbox_endpoints_unauthorized(
         self,
-        async_client: AsyncClient,
-        integration_chat_fixture: tuple[User, Chat, SandboxService],
-        method: str,
-        endpoint_suffix: str,
-        json_body: dict | None,
+        shared_client: AsyncClient,
+        shared_sandbox_url: str,
     ) -> None:
-        _, chat, _ = integration_chat_fixture
-        endpoint = f"/api/v1/sandbox/{chat.sandbox_id}{endpoint_suffix}"
-
-        if method == "GET":
-            response = await async_client.get(endpoint)
-        elif method == "PUT":
-            response = await async_client.put(endpoint, json=json_body)
-        elif method == "POST":
-            response = await async_client.post(endpoint, json=json_body)
-        elif method == "DELETE":
-            response = await async_client.delete(endpoint)
-        else:
-            response = await async_client.request(method, endpoint)
+        responses = await asyncio.gather(
+            *(
+                _send_request(
+                    shared_client,
+                    method,
+                    shared_sandbox_url + endpoint_suffix,
+                    body,
+                )
+                for method, endpoint_suffix, body in _UNAUTHORIZED_ENDPOINTS
+            )
+        )
 
-        assert response.status_code == 401
+        failures = [
+            (method, endpoint_suffix, response.status_code)
+            for (method, endpoint_suffix, _), response in zip(
+                _UNAUTHORIZED_ENDPOINTS, responses, strict=True
+            )
+            if response.status_code != 401
+        ]
+        assert not failures
 
 
 class TestSandboxNotFound:
-    @pytest.mark.parametrize(
-        "method,endpoint_suffix,json_body",
-        [
-            ("GET", "/preview-links", None),
-            ("GET", "/files/metadata", None),
-            ("PUT", "/files", {"file_path": "/test.txt", "content": "test"}),
-            ("GET", "/secrets", None),
-            ("POST", "/secrets", {"key": "TEST", "value": "test"}),
-            ("GET", "/download-zip", None),
-            ("PUT", "/ide-theme", {"theme": "dark"}),
-        ],
-    )
     async def test_sandbox_endpoints_not_found(
         self,
-        async_client: AsyncClient,
-        integration_user_fixture: User,
-        auth_headers: dict[str, str],
-        method: str,
-        endpoint_suffix: str,
-        json_body: dict | None,
+        shared_client: AsyncClient,
+        shared_auth_headers: dict[str, str],
     ) -> None:
-        fake_sandbox_id = f"fake-sandbox-{uuid.uuid4().hex[:8]}"
-        endpoint = f"/api/v1/sandbox/{fake_sandbox_id}{endpoint_suffix}"
-
-        if method == "GET":
-            response = await async_client.get(endpoint, headers=auth_headers)
-        elif method == "PUT":
-            response = await async_client.put(
-                endpoint, json=json_body, headers=auth_headers
-            )
-        elif method == "POST":
-            response = await async_client.post(
-                endpoint, json=json_body, headers=auth_headers
-            )
-        else:
-            response = await async_client.request(
-                method, endpoint, headers=auth_headers
+        responses = await asyncio.gather(
+            *(
+                _send_request(
+                    shared_client,
+                    method,
+                    f"/api/v1/sandbox/{_FAKE_SANDBOX_ID}{endpoint_suffix}",
+                    body,
+                    headers=shared_auth_headers,
+                )
+                for method, endpoint_suffix, body in _ENDPOINTS
             )
+        )
 
-        assert response.status_code == 404
+        failures = [
+            (method, endpoint_suffix, response.status_code)
+            for (method, endpoint_suffix, _), response in zip(
+                _ENDPOINTS, responses, strict=True
+            )
+            if response.status_code != 404
+        ]
+        assert not failures